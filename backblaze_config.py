@@ -1,6 +1,10 @@
 import os
+import threading
+import time
 import requests
+from typing import BinaryIO, Union
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # Load environment variables
 load_dotenv()
@@ -12,6 +16,97 @@ BACKBLAZE_BUCKET_NAME = os.getenv('BACKBLAZE_BUCKET_NAME')
 BACKBLAZE_BASE_URL = os.getenv('BACKBLAZE_BASE_URL')
 BACKBLAZE_API_URL = 'https://api.backblazeb2.com'
 
+# One pooled session for every B2 call, so the API and upload hosts keep their
+# TLS connections between cards. No automatic retries: streamed upload bodies
+# can't be replayed, and failed uploads already fall back to local storage.
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+class _SizedStream:
+    """Readable wrapper that reports a known length.
+
+    requests only sends a Content-Length header for file-like bodies whose size
+    it can determine; B2 rejects chunked uploads, so raw HTTP response streams
+    have to be sized explicitly.
+    """
+    def __init__(self, stream: BinaryIO, length: int):
+        self._stream = stream
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+# Account authorization lasts 24 hours; refresh it an hour early
+ACCOUNT_AUTH_TTL = 23 * 60 * 60
+_auth_lock = threading.Lock()
+_account_auth = None
+_account_auth_expires = 0.0
+# Upload URLs that last succeeded; B2 allows one upload at a time per URL
+_idle_upload_auths = []
+
+def _get_account_auth() -> dict:
+    """Return the cached B2 account authorization, authorizing when it has expired."""
+    global _account_auth, _account_auth_expires
+    with _auth_lock:
+        if _account_auth is None or time.monotonic() >= _account_auth_expires:
+            auth_response = _http.get(
+                f'{BACKBLAZE_API_URL}/b2api/v2/b2_authorize_account',
+                auth=(BACKBLAZE_KEY_ID, BACKBLAZE_APPLICATION_KEY)
+            )
+            auth_response.raise_for_status()
+            _account_auth = auth_response.json()
+            _account_auth_expires = time.monotonic() + ACCOUNT_AUTH_TTL
+            # Upload URLs from the previous authorization expire with it
+            _idle_upload_auths.clear()
+        return _account_auth
+
+def _reset_account_auth() -> None:
+    """Drop the cached authorization so the next request authorizes again."""
+    global _account_auth
+    with _auth_lock:
+        _account_auth = None
+        _idle_upload_auths.clear()
+
+def _acquire_upload_auth() -> dict:
+    """Check out an idle upload URL and its token, requesting a new one if none is free."""
+    with _auth_lock:
+        if _idle_upload_auths:
+            return _idle_upload_auths.pop()
+    
+    auth_data = _get_account_auth()
+    upload_url_response = _http.post(
+        f'{auth_data["apiUrl"]}/b2api/v2/b2_get_upload_url',
+        headers={'Authorization': auth_data['authorizationToken']},
+        json={'bucketId': auth_data['allowed']['bucketId']}
+    )
+    upload_url_response.raise_for_status()
+    return upload_url_response.json()
+
+def _post_upload(filename: str, body: Union[bytes, _SizedStream]) -> None:
+    """Upload one file to B2 through a pooled upload URL."""
+    upload_auth = _acquire_upload_auth()
+    response = _http.post(
+        upload_auth['uploadUrl'],
+        headers={
+            'Authorization': upload_auth['authorizationToken'],
+            'X-Bz-File-Name': filename,
+            'Content-Type': 'image/png',
+            'X-Bz-Content-Sha1': 'do_not_verify'  # For testing only
+        },
+        data=body
+    )
+    if response.status_code == 401:
+        _reset_account_auth()
+    response.raise_for_status()
+    
+    # B2 asks for a fresh upload URL after any error, so only a URL that just
+    # worked goes back in the pool
+    with _auth_lock:
+        _idle_upload_auths.append(upload_auth)
+
 def upload_image(image_data: bytes, filename: str) -> str:
     """
     Upload an image to Backblaze B2 and return its public URL.
@@ -29,35 +124,8 @@ def upload_image(image_data: bytes, filename: str) -> str:
         return f"/static/card_images/{filename}"
 
     try:
-        # Get authorization token
-        auth_response = requests.get(
-            f'{BACKBLAZE_API_URL}/b2api/v2/b2_authorize_account',
-            auth=(BACKBLAZE_KEY_ID, BACKBLAZE_APPLICATION_KEY)
-        )
-        auth_response.raise_for_status()
-        auth_data = auth_response.json()
-        
-        # Get upload URL
-        upload_url_response = requests.post(
-            f'{auth_data["apiUrl"]}/b2api/v2/b2_get_upload_url',
-            headers={'Authorization': auth_data['authorizationToken']},
-            json={'bucketId': auth_data['allowed']['bucketId']}
-        )
-        upload_url_response.raise_for_status()
-        upload_auth = upload_url_response.json()
-        
         # Upload file
-        response = requests.post(
-            upload_auth['uploadUrl'],
-            headers={
-                'Authorization': upload_auth['authorizationToken'],
-                'X-Bz-File-Name': filename,
-                'Content-Type': 'image/png',
-                'X-Bz-Content-Sha1': 'do_not_verify'  # For testing only
-            },
-            data=image_data
-        )
-        response.raise_for_status()
+        _post_upload(filename, image_data)
         
         # Return public URL
         return f"{BACKBLAZE_BASE_URL}/{filename}"
@@ -73,6 +141,31 @@ def upload_image(image_data: bytes, filename: str) -> str:
             print(f"Error saving to local storage: {e}")
             return "/static/default-card.png"
 
+def upload_image_stream(stream: BinaryIO, filename: str, content_length: int) -> str:
+    """
+    Upload an image to Backblaze B2 from a file-like object and return its public URL.
+    
+    The body is read from the stream as it is sent, so the image is never held
+    in memory. Unlike upload_image, a failed upload is raised instead of saved
+    locally: the stream has already been consumed, so the caller has to fetch
+    the image again.
+    
+    Args:
+        stream: A readable binary file-like object, e.g. a streamed response's raw body
+        filename: The name to give the file in B2
+        content_length: The exact number of bytes the stream will yield
+    
+    Returns:
+        str: The public URL of the uploaded image
+    """
+    # Check if Backblaze credentials are configured
+    if not all([BACKBLAZE_KEY_ID, BACKBLAZE_APPLICATION_KEY, BACKBLAZE_BUCKET_NAME, BACKBLAZE_BASE_URL]):
+        print("Warning: Backblaze credentials not configured, using fallback URL")
+        return f"/static/card_images/{filename}"
+
+    _post_upload(filename, _SizedStream(stream, content_length))
+    return f"{BACKBLAZE_BASE_URL}/{filename}"
+
 def delete_image(filename: str) -> bool:
     """
     Delete an image from Backblaze B2.
@@ -95,15 +188,10 @@ def delete_image(filename: str) -> bool:
 
     try:
         # Get authorization
-        auth_response = requests.get(
-            f'{BACKBLAZE_API_URL}/b2api/v2/b2_authorize_account',
-            auth=(BACKBLAZE_KEY_ID, BACKBLAZE_APPLICATION_KEY)
-        )
-        auth_response.raise_for_status()
-        auth_data = auth_response.json()
+        auth_data = _get_account_auth()
         
         # List file versions to get file ID
-        list_response = requests.post(
+        list_response = _http.post(
             f'{auth_data["apiUrl"]}/b2api/v2/b2_list_file_versions',
             headers={'Authorization': auth_data['authorizationToken']},
             json={
@@ -121,7 +209,7 @@ def delete_image(filename: str) -> bool:
         file_data = files[0]
         
         # Delete file
-        delete_response = requests.post(
+        delete_response = _http.post(
             f'{auth_data["apiUrl"]}/b2api/v2/b2_delete_file_version',
             headers={'Authorization': auth_data['authorizationToken']},
             json={
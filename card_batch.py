@@ -0,0 +1,115 @@
+"""Bulk card text generation through the OpenAI Batch API.
+
+Batched requests cost half as much as live ones and don't count against the
+per-minute rate limits, but OpenAI only promises results within 24 hours. Use
+this for seeding the pool of unclaimed cards; user-facing generation stays on
+generate_card(). DALL-E isn't available in batches, so artwork is still made
+per card with generate_card_image().
+"""
+import logging
+import time
+from typing import Dict, Any, List
+
+import orjson
+from openai.types import Batch
+from openai_config import openai_client
+from card_generator import card_chat_params, finish_card_data, generate_card_prompt
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 60  # seconds
+BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+def build_batch_requests(n: int, rarity: str = None) -> List[Dict[str, Any]]:
+    """Build one Batch API request line per card, with the same arguments as live requests."""
+    return [
+        {
+            "custom_id": f"card-{i}",
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_ENDPOINT,
+            "body": card_chat_params(generate_card_prompt(rarity)),
+        }
+        for i in range(n)
+    ]
+
+def submit_card_batch(n: int, rarity: str = None) -> str:
+    """Upload requests for n cards as a JSONL file and start a batch. Returns the batch ID."""
+    requests_jsonl = b"\n".join(orjson.dumps(request) for request in build_batch_requests(n, rarity))
+    input_file = openai_client.files.create(file=("cards.jsonl", requests_jsonl), purpose="batch")
+    batch = openai_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=CHAT_COMPLETIONS_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+        metadata={"rarity": rarity or "any"}
+    )
+    logger.info("Submitted card batch %s for %d cards", batch.id, n)
+    return batch.id
+
+def wait_for_batch(batch_id: str, poll_interval: float = BATCH_POLL_INTERVAL) -> Batch:
+    """Poll a batch until it completes, fails, expires or is cancelled."""
+    while True:
+        batch = openai_client.batches.retrieve(batch_id)
+        if batch.status in BATCH_FINAL_STATES:
+            logger.info("Card batch %s finished as %s", batch_id, batch.status)
+            return batch
+
+        counts = batch.request_counts
+        logger.info(
+            "Card batch %s is %s (%d/%d done)", batch_id, batch.status,
+            counts.completed if counts else 0, counts.total if counts else 0
+        )
+        time.sleep(poll_interval)
+
+def collect_batch_cards(batch: Batch, rarity: str = None) -> List[Dict[str, Any]]:
+    """Parse and standardize the cards in a finished batch's output file.
+
+    Failed requests and invalid cards are logged and skipped, so fewer cards
+    than were requested may come back. Expired batches still return whatever
+    finished in time.
+    """
+    if not batch.output_file_id:
+        raise ValueError(f"Card batch {batch.id} ended as {batch.status} with no output")
+
+    output = openai_client.files.content(batch.output_file_id)
+    cards = []
+    for line in output.content.splitlines():
+        if not line:
+            continue
+        try:
+            result = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Unreadable line in card batch %s output: %s", batch.id, e)
+            continue
+        if not isinstance(result, dict):
+            logger.warning("Unexpected line in card batch %s output: %r", batch.id, result)
+            continue
+        response = result.get("response")
+        if result.get("error") or not response or response.get("status_code") != 200:
+            logger.warning("Card request %s failed: %s", result.get("custom_id"), result.get("error") or response)
+            continue
+
+        try:
+            card_data = orjson.loads(response["body"]["choices"][0]["message"]["content"])
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.warning("Unreadable reply for card request %s: %s", result.get("custom_id"), e)
+            continue
+
+        try:
+            valid = isinstance(card_data, dict) and finish_card_data(card_data, rarity)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Malformed card from request %s: %r", result.get("custom_id"), e)
+            continue
+        if not valid:
+            logger.warning("Dropping invalid card from request %s", result.get("custom_id"))
+            continue
+        cards.append(card_data)
+
+    logger.info("Collected %d valid cards from batch %s", len(cards), batch.id)
+    return cards
+
+def generate_cards_data_batched(n: int, rarity: str = None, poll_interval: float = BATCH_POLL_INTERVAL) -> List[Dict[str, Any]]:
+    """Generate the text of n cards through the Batch API, blocking until the batch finishes."""
+    batch = wait_for_batch(submit_card_batch(n, rarity), poll_interval)
+    return collect_batch_cards(batch, rarity)
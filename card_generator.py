@@ -1,22 +1,47 @@
+import asyncio
 import random
-import json
 import logging
+import threading
+import time
+import fastjsonschema
+import orjson
 import requests
-import io
-from typing import Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Sequence, Tuple
 from datetime import datetime
-from tenacity import retry, stop_after_attempt, wait_random_exponential
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from openai_config import openai_client
-from backblaze_config import upload_image
+from backblaze_config import upload_image, upload_image_stream
 from models import Rarity
 
-# Logging configuration
-logging.basicConfig(
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Logging is configured by the application entry point
 logger = logging.getLogger(__name__)
 
+# Shared session for image downloads; DALL-E URLs all point at the same host,
+# so keep-alive connections skip a TCP+TLS handshake per card. Transient
+# connection errors and 5xx responses are retried by urllib3 with backoff.
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+))
+
+# Single generator for all card sampling, with its methods bound once
+_rng = random.Random()
+_random = _rng.random
+_choice = _rng.choice
+_choices = _rng.choices
+_shuffle = _rng.shuffle
+_randint = _rng.randint
+
+def seed(value: Any = None) -> None:
+    """Seed the card sampler so prompts, types, colors and rarities can be reproduced."""
+    _rng.seed(value)
+
 # Constants
 DEFAULT_SET_NAME = 'GEN'
 CARD_NUMBER_LIMIT = 999
@@ -26,41 +51,38 @@ BASE_RARITY_PROBABILITIES = {
     Rarity.RARE: 0.062,       # ~7/8 of rare slots (7/8 * 1/14)
     Rarity.MYTHIC_RARE: 0.01  # ~1/8 of rare slots (1/8 * 1/14)
 }
+RARITY_OPTIONS = ', '.join(r.value for r in Rarity)
+_ANY_RARITY_PROMPT = f"Choose from: {RARITY_OPTIONS}"
+# Rarity lookup by the spellings GPT and callers actually use
+_RARITY_BY_NAME = {key: r for r in Rarity for key in (r.name, r.value, r.value.lower(), r.value.upper())}
 
 # Color combinations
-MONO_COLORS = ['White', 'Blue', 'Black', 'Red', 'Green']
-GUILD_COLORS = [
+MONO_COLORS = ('White', 'Blue', 'Black', 'Red', 'Green')
+_COLOR_SYMBOL = {'White': '{W}', 'Blue': '{U}', 'Black': '{B}', 'Red': '{R}', 'Green': '{G}'}
+GUILD_COLORS = (
     ('White', 'Blue'), ('Blue', 'Black'), ('Black', 'Red'), ('Red', 'Green'),
     ('Green', 'White'), ('White', 'Black'), ('Blue', 'Red'), ('Black', 'Green'),
     ('Red', 'White'), ('Green', 'Blue')
-]
-SHARD_COLORS = [
+)
+SHARD_COLORS = (
     ('White', 'Blue', 'Black'), ('Blue', 'Black', 'Red'), ('Black', 'Red', 'Green'),
     ('Red', 'Green', 'White'), ('Green', 'White', 'Blue')
-]
+)
 
-# Common MTG themes by color
-COLOR_THEMES = {
-    'White': {
-        'creatures': ['Angel', 'Knight', 'Soldier', 'Cleric', 'Bird', 'Cat', 'Unicorn', 'Griffin', 'Pegasus', 'Human'],
-        'keywords': ['Vigilance', 'Protection', 'Lifelink', 'First Strike', 'Flying', 'Exile', 'Shield', 'Unity', 'Divine', 'Order']
-    },
-    'Blue': {
-        'creatures': ['Wizard', 'Merfolk', 'Sphinx', 'Drake', 'Illusion', 'Serpent', 'Leviathan', 'Djinn', 'Shapeshifter', 'Elemental'],
-        'keywords': ['Flying', 'Scry', 'Counter', 'Bounce', 'Draw', 'Control', 'Knowledge', 'Mind', 'Illusion', 'Manipulation']
-    },
-    'Black': {
-        'creatures': ['Zombie', 'Vampire', 'Demon', 'Horror', 'Skeleton', 'Wraith', 'Shade', 'Specter', 'Rat', 'Nightmare'],
-        'keywords': ['Deathtouch', 'Lifelink', 'Sacrifice', 'Destroy', 'Drain', 'Corrupt', 'Death', 'Decay', 'Dark', 'Torment']
-    },
-    'Red': {
-        'creatures': ['Dragon', 'Goblin', 'Warrior', 'Phoenix', 'Elemental', 'Ogre', 'Devil', 'Giant', 'Shaman', 'Berserker'],
-        'keywords': ['Haste', 'First Strike', 'Direct Damage', 'Trample', 'Fury', 'Rage', 'Burn', 'Chaos', 'Lightning', 'Fire']
-    },
-    'Green': {
-        'creatures': ['Beast', 'Elf', 'Druid', 'Wurm', 'Hydra', 'Treefolk', 'Spider', 'Wolf', 'Bear', 'Dinosaur'],
-        'keywords': ['Trample', 'Reach', 'Fight', 'Growth', 'Ramp', 'Natural', 'Wild', 'Primal', 'Forest', 'Strength']
-    }
+# Common MTG themes by color, as parallel creature and keyword tables
+COLOR_CREATURES = {
+    'White': ('Angel', 'Knight', 'Soldier', 'Cleric', 'Bird', 'Cat', 'Unicorn', 'Griffin', 'Pegasus', 'Human'),
+    'Blue': ('Wizard', 'Merfolk', 'Sphinx', 'Drake', 'Illusion', 'Serpent', 'Leviathan', 'Djinn', 'Shapeshifter', 'Elemental'),
+    'Black': ('Zombie', 'Vampire', 'Demon', 'Horror', 'Skeleton', 'Wraith', 'Shade', 'Specter', 'Rat', 'Nightmare'),
+    'Red': ('Dragon', 'Goblin', 'Warrior', 'Phoenix', 'Elemental', 'Ogre', 'Devil', 'Giant', 'Shaman', 'Berserker'),
+    'Green': ('Beast', 'Elf', 'Druid', 'Wurm', 'Hydra', 'Treefolk', 'Spider', 'Wolf', 'Bear', 'Dinosaur')
+}
+COLOR_KEYWORDS = {
+    'White': ('Vigilance', 'Protection', 'Lifelink', 'First Strike', 'Flying', 'Exile', 'Shield', 'Unity', 'Divine', 'Order'),
+    'Blue': ('Flying', 'Scry', 'Counter', 'Bounce', 'Draw', 'Control', 'Knowledge', 'Mind', 'Illusion', 'Manipulation'),
+    'Black': ('Deathtouch', 'Lifelink', 'Sacrifice', 'Destroy', 'Drain', 'Corrupt', 'Death', 'Decay', 'Dark', 'Torment'),
+    'Red': ('Haste', 'First Strike', 'Direct Damage', 'Trample', 'Fury', 'Rage', 'Burn', 'Chaos', 'Lightning', 'Fire'),
+    'Green': ('Trample', 'Reach', 'Fight', 'Growth', 'Ramp', 'Natural', 'Wild', 'Primal', 'Forest', 'Strength')
 }
 
 # Card type weights by rarity
@@ -103,130 +125,339 @@ COLOR_WEIGHTS = {
     Rarity.MYTHIC_RARE: {'mono': 0.4, 'guild': 0.4, 'shard': 0.2}
 }
 
-def get_color_combination(rarity: Rarity) -> List[str]:
+# Card data schema: GPT field names, required fields, and their fallbacks
+FIELD_RENAMES = {
+    'Name': 'name',
+    'ManaCost': 'manaCost',
+    'Type': 'type',
+    'Color': 'color',
+    'Abilities': 'abilities',
+    'FlavorText': 'flavorText',
+    'Rarity': 'rarity',
+    'PowerToughness': 'powerToughness',
+    'Power': 'power',
+    'Toughness': 'toughness'
+}
+REQUIRED_FIELDS = ('name', 'manaCost', 'type', 'color', 'abilities', 'flavorText', 'rarity')
+DEFAULT_FIELD_VALUES = {
+    'name': 'Unnamed Card',
+    'manaCost': '{0}',
+    'type': 'Unknown Type',
+    'color': 'Colorless',
+    'abilities': 'No abilities',
+    'flavorText': 'No flavor text',
+    'rarity': Rarity.COMMON.value,
+    'powerToughness': 'N/A'
+}
+ABILITY_LENGTH_LIMIT = 150  # per ability
+_TRUNCATED_ABILITY_LENGTH = ABILITY_LENGTH_LIMIT - len('...')
+MAX_ABILITIES = 4
+
+# Field rules for a standardized card, compiled once into a validator
+CARD_SCHEMA = {
+    'type': 'object',
+    'required': list(REQUIRED_FIELDS),
+    'properties': {
+        'name': {'type': 'string', 'minLength': 1, 'maxLength': 40},
+        # Mana symbols are written in curly braces, e.g. {2}{W}
+        'manaCost': {'type': 'string', 'minLength': 1, 'maxLength': 20, 'pattern': r'\{.*\}'},
+        'type': {
+            'type': 'string',
+            'maxLength': 50,
+            'pattern': 'Creature|Instant|Sorcery|Enchantment|Artifact|Planeswalker'
+        },
+        'color': {'type': ['string', 'array'], 'minLength': 1, 'minItems': 1},
+        'abilities': {'type': ['string', 'array'], 'minLength': 1, 'minItems': 1},
+        'flavorText': {'type': 'string', 'minLength': 1, 'maxLength': 120},
+        'rarity': {'type': 'string', 'minLength': 1}
+    }
+}
+_validate_card_schema = fastjsonschema.compile(CARD_SCHEMA)
+
+def parse_rarity(rarity: str) -> Rarity:
+    """Resolve a rarity name such as 'Mythic Rare' or 'MYTHIC_RARE' to its enum."""
+    try:
+        return _RARITY_BY_NAME[rarity]
+    except KeyError:
+        return Rarity[rarity.upper().replace(' ', '_')]
+
+class AliasTable:
+    """Fixed discrete distribution sampled in O(1) with Walker's alias method."""
+    __slots__ = ('keys', 'prob', 'alias')
+
+    def __init__(self, keys: Sequence[Any], weights: Sequence[float]):
+        n = len(keys)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        # Vose's construction: pair each under-full column with an over-full one
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        self.keys = tuple(keys)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+
+    @classmethod
+    def from_weights(cls, weights: Dict[Any, float]) -> 'AliasTable':
+        return cls(list(weights), list(weights.values()))
+
+    def sample(self) -> Any:
+        # One uniform draw: the integer part picks a column, the fraction flips its coin
+        u = _random() * len(self.keys)
+        i = int(u)
+        return self.keys[i] if u - i < self.prob[i] else self.keys[self.alias[i]]
+
+    def sample_n(self, k: int) -> List[Any]:
+        return [self.sample() for _ in range(k)]
+
+# Sampling tables, precomputed once so the per-card helpers don't rebuild them
+_TYPE_TABLES = {rarity: AliasTable.from_weights(weights) for rarity, weights in TYPE_WEIGHTS.items()}
+_COLOR_TABLES = {rarity: AliasTable.from_weights(weights) for rarity, weights in COLOR_WEIGHTS.items()}
+
+def get_color_combination(rarity: Rarity) -> Tuple[str, ...]:
     """Get a color combination based on rarity weights."""
-    weights = COLOR_WEIGHTS[rarity]
-    combo_type = random.choices(
-        list(weights.keys()),
-        weights=list(weights.values())
-    )[0]
+    combo_type = _COLOR_TABLES[rarity].sample()
     
     if combo_type == 'mono':
-        return [random.choice(MONO_COLORS)]
+        return (_choice(MONO_COLORS),)
     elif combo_type == 'guild':
-        return list(random.choice(GUILD_COLORS))
+        return _choice(GUILD_COLORS)
     else:  # shard
-        return list(random.choice(SHARD_COLORS))
+        return _choice(SHARD_COLORS)
 
 def get_card_type(rarity: Rarity) -> str:
     """Get a card type based on rarity weights."""
-    weights = TYPE_WEIGHTS[rarity]
-    return random.choices(
-        list(weights.keys()),
-        weights=list(weights.values())
-    )[0]
+    return _TYPE_TABLES[rarity].sample()
+
+def get_card_types_batch(rarity: Rarity, n: int) -> List[str]:
+    """Get n card types for one rarity in a single draw."""
+    return _TYPE_TABLES[rarity].sample_n(n)
+
+def get_color_combinations_batch(rarity: Rarity, n: int) -> List[Tuple[str, ...]]:
+    """Get n color combinations for one rarity, drawing each pool in bulk."""
+    combo_types = _COLOR_TABLES[rarity].sample_n(n)
+    
+    combinations = [(color,) for color in _choices(MONO_COLORS, k=combo_types.count('mono'))]
+    combinations.extend(_choices(GUILD_COLORS, k=combo_types.count('guild')))
+    combinations.extend(_choices(SHARD_COLORS, k=combo_types.count('shard')))
+    # Draws are grouped by pool above; shuffle so callers can't see that order
+    _shuffle(combinations)
+    return combinations
+
+def _draw_types_and_colors(n: int, rarity: str = None) -> List[Tuple[str, Tuple[str, ...]]]:
+    """Draw (card type, colors) for n cards of one rarity in bulk.
 
-def get_themed_elements(colors: List[str]) -> Dict[str, Any]:
+    Without a rarity both are None, leaving each card's prompt to pick its own.
+    """
+    if not rarity:
+        return [(None, None)] * n
+    rarity_enum = parse_rarity(rarity)
+    return list(zip(get_card_types_batch(rarity_enum, n), get_color_combinations_batch(rarity_enum, n)))
+
+def _tiny_sample(pool: Sequence[str], k: int) -> Tuple[str, ...]:
+    """Draw 2 or 3 distinct items from pool.
+
+    Each index is drawn from the positions not yet taken and shifted past the
+    taken ones, which avoids the set bookkeeping random.sample does.
+    """
+    n = len(pool)
+    i = int(_random() * n)
+    j = int(_random() * (n - 1))
+    j += j >= i
+    if k == 2:
+        return pool[i], pool[j]
+    low, high = (i, j) if i < j else (j, i)
+    m = int(_random() * (n - 2))
+    m += m >= low
+    m += m >= high
+    return pool[i], pool[j], pool[m]
+
+def get_themed_elements(colors: Sequence[str]) -> Dict[str, Tuple[str, ...]]:
     """Get themed elements based on card colors."""
     creatures = []
     keywords = []
+    seen_creatures = set()
+    seen_keywords = set()
     
-    # Gather themes from each color
+    # Replies may list colors or name several in one 'White/Blue' string;
+    # split those and skip anything that isn't one of the five colors
+    known_colors = []
     for color in colors:
-        color_creatures = COLOR_THEMES[color]['creatures']
-        color_keywords = COLOR_THEMES[color]['keywords']
-        
-        # Add 2-3 random creatures and keywords from each color
-        creatures.extend(random.sample(color_creatures, min(random.randint(2, 3), len(color_creatures))))
-        keywords.extend(random.sample(color_keywords, min(random.randint(2, 3), len(color_keywords))))
+        if isinstance(color, str):
+            known_colors.extend(
+                part for part in map(str.strip, color.split('/')) if part in COLOR_CREATURES
+            )
     
-    # Remove duplicates while preserving order
-    creatures = list(dict.fromkeys(creatures))
-    keywords = list(dict.fromkeys(keywords))
+    # Gather themes from each color, skipping duplicates while preserving order
+    for color in known_colors:
+        # Add 2-3 random creatures and keywords from each color
+        for creature in _tiny_sample(COLOR_CREATURES[color], 2 + (_random() < 0.5)):
+            if creature not in seen_creatures:
+                seen_creatures.add(creature)
+                creatures.append(creature)
+        for keyword in _tiny_sample(COLOR_KEYWORDS[color], 2 + (_random() < 0.5)):
+            if keyword not in seen_keywords:
+                seen_keywords.add(keyword)
+                keywords.append(keyword)
     
     return {
-        'creatures': creatures,
-        'keywords': keywords,
-        'colors': colors
+        'creatures': tuple(creatures),
+        'keywords': tuple(keywords),
+        'colors': tuple(known_colors)
     }
 
-def generate_card_prompt(rarity: str = None) -> str:
-    """Generate the GPT prompt for creating the card."""
+@lru_cache(maxsize=64)
+def _creature_pool(colors: Tuple[str, ...]) -> Tuple[str, ...]:
+    """All creature types of a color combination, without duplicates."""
+    return tuple(dict.fromkeys(creature for color in colors for creature in COLOR_CREATURES[color]))
+
+@lru_cache(maxsize=64)
+def _keyword_pool(colors: Tuple[str, ...]) -> Tuple[str, ...]:
+    """All keywords of a color combination, without duplicates."""
+    return tuple(dict.fromkeys(keyword for color in colors for keyword in COLOR_KEYWORDS[color]))
+
+def get_creature_names(colors: Sequence[str], n: int = 2) -> Tuple[str, ...]:
+    """Draw n (2 or 3) distinct creature types from a color combination."""
+    return _tiny_sample(_creature_pool(tuple(colors)), n)
+
+def get_keywords(colors: Sequence[str], n: int = 2) -> Tuple[str, ...]:
+    """Draw n (2 or 3) distinct keywords from a color combination."""
+    return _tiny_sample(_keyword_pool(tuple(colors)), n)
+
+# Instructions shared by every card prompt, ahead of the per-card
+# specifications. OpenAI only caches prompts of 1,024 tokens or more, and a
+# card prompt is about a third of that, so this ordering doesn't earn cache
+# hits yet; it keeps the shared text first should prompts ever grow past it.
+_PROMPT_FIELDS = (
+    "- Name: Brief, thematic name (max 40 chars) using elements from the listed creatures.\n"
+    "- ManaCost: Mana symbols in curly braces, following the guidance below.\n"
+    "- Type, Color, Rarity: As specified below.\n"
+    "- Abilities: Create 1-3 concise, synergistic abilities that:\n"
+    "  * Incorporate the listed keywords\n"
+    "  * Focus on clear, direct effects\n"
+    "  * Each ability should be under 150 characters\n"
+    "  * Prefer established keyword mechanics when possible\n"
+    "- PowerToughness: For creatures, use balanced stats matching the mana cost.\n"
+    "- FlavorText: One impactful sentence (max 120 chars) capturing the card's essence.\n"
+)
+_PROMPT_PREFIX = (
+    "Design a focused Magic: The Gathering card. Return a JSON object with these fields. "
+    "Keep text concise and focused.\n"
+    f"{_PROMPT_FIELDS}"
+    "Specifications for this card:\n"
+)
+# Several cards share one request: the field instructions are sent once and
+# each card only adds its numbered specification
+_BATCH_PROMPT_PREFIX = (
+    "Design {count} distinct, focused Magic: The Gathering cards, one per numbered "
+    "specification below. Return a JSON object whose \"cards\" array holds one card "
+    "object per specification, in order, each with these fields. "
+    "Keep text concise and focused.\n"
+    f"{_PROMPT_FIELDS}"
+)
+
+@lru_cache(maxsize=256)
+def _prompt_template(rarity_prompt: str, card_type: str, colors: Tuple[str, ...], with_mana_guidance: bool) -> str:
+    """Build the specification lines of a card prompt for one rarity, type and color combination."""
+    mana_cost_guidance = ""
+    if with_mana_guidance:
+        color_symbols = ''.join(_COLOR_SYMBOL[c] for c in colors)
+        mana_cost_guidance = (
+            f"Use {' and '.join(colors)} mana symbols with optional generic mana. "
+            f"Example: {{2}}{color_symbols} for a 4-cost card."
+        )
+    
+    return ''.join([
+        f"- ManaCost: {mana_cost_guidance or 'Balanced mana cost with curly braces {X}.'}\n",
+        f"- Type: {card_type}\n",
+        f"- Color: {'/'.join(colors)}\n",
+        f"- Rarity: {rarity_prompt}\n",
+    ])
+
+def _card_specification(rarity: str = None, card_type: str = None, colors: Sequence[str] = None) -> str:
+    """Build the specification lines of one card's prompt.
+
+    card_type and colors are drawn from the rarity's weights unless given.
+    """
     if not rarity:
-        rarity_options = ', '.join([r.value for r in Rarity])
-        rarity_prompt = f"Choose from: {rarity_options}"
+        rarity_prompt = _ANY_RARITY_PROMPT
     else:
         rarity_prompt = rarity
-        rarity_enum = Rarity[rarity.upper().replace(' ', '_')]
+        rarity_enum = parse_rarity(rarity)
     
     # Get card type and color combination if rarity is specified
-    card_type = get_card_type(rarity_enum) if rarity else "any appropriate type"
-    colors = get_color_combination(rarity_enum) if rarity else [random.choice(MONO_COLORS)]
-    color_str = '/'.join(colors)
-    
-    # Get themed elements based on colors
-    themes = get_themed_elements(colors)
+    if card_type is None:
+        card_type = get_card_type(rarity_enum) if rarity else "any appropriate type"
+    if colors is None:
+        colors = get_color_combination(rarity_enum) if rarity else (_choice(MONO_COLORS),)
     
-    # Simple mana cost guidance
-    mana_cost_guidance = ""
-    if rarity:
-        color_symbols = ''.join(f"{{{c[0]}}}" for c in colors)  # First letter of each color
-        mana_cost_guidance = f"Use {' and '.join(colors)} mana symbols with optional generic mana. "
-        mana_cost_guidance += f"Example: {'{2}' + color_symbols} for a 4-cost card."
-    
-    # Build the prompt with emphasis on concise, focused design
-    prompt = (
-        f"Design a focused Magic: The Gathering card with these specifications:\n"
-        f"- Name: Brief, thematic name (max 40 chars) using elements from {', '.join(themes['creatures'][:2])}.\n"
-        f"- ManaCost: {mana_cost_guidance if mana_cost_guidance else 'Balanced mana cost with curly braces {X}.'}\n"
-        f"- Type: {card_type}\n"
-        f"- Color: {color_str}\n"
-        "- Abilities: Create 1-3 concise, synergistic abilities that:\n"
-        f"  * Incorporate these keywords: {', '.join(random.sample(themes['keywords'], min(2, len(themes['keywords']))))}\n"
-        "  * Focus on clear, direct effects\n"
-        "  * Each ability should be under 150 characters\n"
-        "  * Prefer established keyword mechanics when possible\n"
-        "- PowerToughness: For creatures, use balanced stats matching the mana cost.\n"
-        f"- FlavorText: One impactful sentence (max 120 chars) capturing the card's essence.\n"
-        f"- Rarity: {rarity_prompt}\n"
-        "Return a JSON object with these fields. Keep text concise and focused."
+    # Append the per-card creatures and keywords to the cached specification,
+    # sampling only the two of each the prompt uses
+    return (
+        f"{_prompt_template(rarity_prompt, card_type, tuple(colors), bool(rarity))}"
+        f"- Creatures: {', '.join(get_creature_names(colors))}\n"
+        f"- Keywords: {', '.join(get_keywords(colors))}"
     )
+
+def generate_card_prompt(rarity: str = None, card_type: str = None, colors: Sequence[str] = None) -> str:
+    """Generate the GPT prompt for creating the card.
+
+    card_type and colors are drawn from the rarity's weights unless given.
+    """
+    prompt = _PROMPT_PREFIX + _card_specification(rarity, card_type, colors)
     
     # Log the final prompt
-    logger.info(f"Generated DALL-E prompt: {prompt}")
+    logger.debug("Generated card prompt: %s", prompt)
+    return prompt
+
+def generate_cards_prompt(count: int, rarity: str = None) -> str:
+    """Generate one GPT prompt asking for count cards at once."""
+    specs = [
+        _card_specification(rarity, card_type, colors)
+        for card_type, colors in _draw_types_and_colors(count, rarity)
+    ]
+    
+    prompt = _BATCH_PROMPT_PREFIX.format(count=count) + ''.join(
+        f"Card {i}:\n{spec}\n" for i, spec in enumerate(specs, 1)
+    )
+    logger.debug("Generated prompt for %d cards: %s", count, prompt)
     return prompt
 
 def safe_get_dict(data: Dict[str, Any], key: str, default: Any = None) -> Any:
     """Safely get a value from a dictionary, providing a default if the key is missing."""
     return data.get(key, default)
 
-def standardize_card_data(card_data: Dict[str, Any]) -> None:
-    """Standardizes card data fields and ensures all required fields are present with length validation."""
-    # Character limits for different fields
-    LIMITS = {
-        'name': 40,
-        'abilities': 150,  # per ability
-        'flavorText': 120,
-        'type': 50
-    }
-    
-    mapping = {
-        'Name': 'name',
-        'ManaCost': 'manaCost',
-        'Type': 'type',
-        'Color': 'color',
-        'Abilities': 'abilities',
-        'FlavorText': 'flavorText',
-        'Rarity': 'rarity',
-        'PowerToughness': 'powerToughness',
-        'Power': 'power',
-        'Toughness': 'toughness'
-    }
+def _format_ability(ability: Any) -> str:
+    """Render one GPT ability as text, truncated to the per-ability length limit."""
+    if isinstance(ability, dict):
+        text = ability.get('Description', '')
+        if ability.get('Type') == 'Activated' and ability.get('Cost'):
+            text = f"{ability['Cost']}: {text}"
+    elif isinstance(ability, str):
+        text = ability
+    else:
+        text = str(ability)
+    # Truncate ability text if too long
+    if len(text) > ABILITY_LENGTH_LIMIT:
+        text = text[:_TRUNCATED_ABILITY_LENGTH] + '...'
+    return text
+
+def standardize_card_data(card_data: Dict[str, Any]) -> bool:
+    """Standardizes card data fields and ensures all required fields are present with length validation.
 
-    # Transfer uppercase values to lowercase fields if present
-    for old_key, new_key in mapping.items():
-        if old_key in card_data:
-            card_data[new_key] = card_data.pop(old_key)
+    Returns whether the standardized card passes validation.
+    """
+    # Transfer uppercase values to lowercase fields, visiting only the keys
+    # the reply has rather than probing every possible rename
+    for old_key in [key for key in card_data if key in FIELD_RENAMES]:
+        card_data[FIELD_RENAMES[old_key]] = card_data.pop(old_key)
     
     # Format abilities with length validation
     if 'abilities' in card_data:
@@ -236,139 +467,71 @@ def standardize_card_data(card_data: Dict[str, Any]) -> None:
         if isinstance(abilities, str):
             try:
                 # Try to parse as JSON if it's a string representation of JSON
-                abilities = json.loads(abilities)
-            except json.JSONDecodeError:
+                abilities = orjson.loads(abilities)
+            except orjson.JSONDecodeError:
                 # If not JSON, split by newlines and filter empty lines
-                abilities = [line.strip() for line in abilities.splitlines() if line.strip()]
+                abilities = [line for line in map(str.strip, abilities.splitlines()) if line]
         
         # Ensure abilities is a list
         if not isinstance(abilities, list):
             abilities = [str(abilities)]
         
-        # Format each ability with length limits
-        formatted_abilities = []
-        for ability in abilities:
-            if isinstance(ability, dict):
-                desc = ability.get('Description', '')
-                if ability.get('Type') == 'Activated' and ability.get('Cost'):
-                    desc = f"{ability['Cost']}: {desc}"
-                # Truncate description if too long
-                if len(desc) > LIMITS['abilities']:
-                    desc = desc[:LIMITS['abilities']-3] + '...'
-                formatted_abilities.append(desc)
-            else:
-                ability_text = str(ability)
-                # Truncate ability text if too long
-                if len(ability_text) > LIMITS['abilities']:
-                    ability_text = ability_text[:LIMITS['abilities']-3] + '...'
-                formatted_abilities.append(ability_text)
+        # Limit total number of abilities before formatting them
+        if len(abilities) > MAX_ABILITIES:
+            abilities = abilities[:MAX_ABILITIES]
+            logger.warning("Card %s had too many abilities, truncated to %d", card_data.get('name', 'Unknown'), MAX_ABILITIES)
         
-        # Limit total number of abilities
-        if len(formatted_abilities) > 4:
-            formatted_abilities = formatted_abilities[:4]
-            logger.warning(f"Card {card_data.get('name', 'Unknown')} had too many abilities, truncated to 4")
-        
-        # Join abilities with line breaks
-        card_data['abilities'] = '<br>'.join(formatted_abilities)
+        # Kept as a list; card_to_dict joins them with line breaks for storage
+        card_data['abilities'] = [_format_ability(ability) for ability in abilities]
     
     # Handle power/toughness
     if 'type' in card_data and 'Creature' in card_data['type']:
-        power = card_data.get('power', card_data.get('Power', '0'))
-        toughness = card_data.get('toughness', card_data.get('Toughness', '0'))
+        # Power and Toughness were already renamed above
+        power = card_data.get('power', '0')
+        toughness = card_data.get('toughness', '0')
         card_data['powerToughness'] = f"{power}/{toughness}"
     else:
         card_data['powerToughness'] = ''
     
     # Validate required fields
-    required_fields = ['name', 'manaCost', 'type', 'color', 'abilities', 'flavorText', 'rarity']
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in card_data or not card_data[field]:
             card_data[field] = get_default_value_for_field(field)
 
-    # Convert rarity string to enum if it's a string
-    if isinstance(card_data.get('rarity'), str):
+    # Normalize rarity to its canonical string value for Firestore
+    rarity = card_data['rarity']
+    if isinstance(rarity, str):
         try:
-            card_data['rarity'] = Rarity[card_data['rarity'].upper().replace(' ', '_')]
+            rarity = parse_rarity(rarity)
         except KeyError:
-            card_data['rarity'] = Rarity.COMMON
-
-    # Convert rarity enum to string value for Firestore
-    if isinstance(card_data.get('rarity'), Rarity):
-        card_data['rarity'] = card_data['rarity'].value
+            rarity = Rarity.COMMON
+    if isinstance(rarity, Rarity):
+        card_data['rarity'] = rarity.value
+    
+    # Abilities were already capped in count and length above, so only the
+    # remaining fields need checking
+    return _validate_fields(card_data)
 
 def get_default_value_for_field(field: str) -> Any:
     """Provide default values for missing card fields."""
-    default_values = {
-        'name': 'Unnamed Card',
-        'manaCost': '{0}',
-        'type': 'Unknown Type',
-        'color': 'Colorless',
-        'abilities': 'No abilities',
-        'flavorText': 'No flavor text',
-        'rarity': Rarity.COMMON.value,
-        'powerToughness': 'N/A'
-    }
-    return default_values.get(field, 'Unknown')
+    return DEFAULT_FIELD_VALUES.get(field, 'Unknown')
 
 def get_next_set_name_and_number() -> Tuple[str, int, int]:
     """Get the next set name, set number, and card number."""
-    set_number = random.randint(1, 10)
-    return DEFAULT_SET_NAME, set_number, random.randint(1, CARD_NUMBER_LIMIT)
-
-def validate_card_data(card_data: Dict[str, Any]) -> bool:
-    """Validate the generated card data meets requirements and length limits."""
-    required_fields = ['name', 'manaCost', 'type', 'color', 'abilities', 'flavorText', 'rarity']
-    
-    # Length limits for validation
-    LIMITS = {
-        'name': 40,
-        'type': 50,
-        'flavorText': 120,
-        'manaCost': 20
-    }
-    
-    # Check all required fields are present, non-empty, and within length limits
-    for field in required_fields:
-        if not card_data.get(field):
-            logger.error(f"Missing or empty required field: {field}")
-            return False
-        
-        # Check length limits for text fields
-        if field in LIMITS and len(str(card_data[field])) > LIMITS[field]:
-            logger.error(f"Field {field} exceeds length limit of {LIMITS[field]} characters")
-            return False
-    
-    # Validate mana cost format (should contain curly braces)
-    if not ('{' in card_data['manaCost'] and '}' in card_data['manaCost']):
-        logger.error("Invalid mana cost format")
-        return False
-    
-    # Validate card type
-    valid_types = ['Creature', 'Instant', 'Sorcery', 'Enchantment', 'Artifact', 'Planeswalker']
-    if not any(type_word in card_data['type'] for type_word in valid_types):
-        logger.error("Invalid card type")
-        return False
-    
-    # Validate color
-    if not isinstance(card_data.get('color'), (str, list)):
-        logger.error("Invalid color format")
+    set_number = _randint(1, 10)
+    return DEFAULT_SET_NAME, set_number, _randint(1, CARD_NUMBER_LIMIT)
+
+def _validate_fields(card_data: Dict[str, Any]) -> bool:
+    """Validate the required fields, mana cost, type and color of a card."""
+    try:
+        _validate_card_schema(card_data)
+    except fastjsonschema.JsonSchemaValueException as e:
+        logger.error("Invalid card data: %s", e.message)
         return False
-    
-    # Validate abilities format and count
-    if isinstance(card_data['abilities'], str):
-        abilities = card_data['abilities'].split('<br>')
-        if len(abilities) > 4:
-            logger.error("Too many abilities (maximum 4 allowed)")
-            return False
-        for ability in abilities:
-            if len(ability) > 150:  # Max length per ability
-                logger.error("Ability text too long (maximum 150 characters per ability)")
-                return False
-    
     return True
 
-def get_rarity(set_number: int, card_number: int) -> Rarity:
-    """Determine card rarity based on set and card number."""
+def _rarity_probabilities(set_number: int, card_number: int) -> Dict[Rarity, float]:
+    """Base rarity probabilities adjusted for a set and card number, normalized."""
     # Base probabilities
     probabilities = BASE_RARITY_PROBABILITIES.copy()
 
@@ -394,183 +557,318 @@ def get_rarity(set_number: int, card_number: int) -> Rarity:
 
     # Normalize probabilities
     total = sum(probabilities.values())
-    normalized_probabilities = {k: v / total for k, v in probabilities.items()}
-
-    # Choose rarity based on normalized probabilities
-    rarity = random.choices(
-        list(normalized_probabilities.keys()),
-        weights=list(normalized_probabilities.values())
-    )[0]
-    return rarity
-
-@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(5))
-def generate_card(rarity: str = None) -> Dict[str, Any]:
-    """Generate a card with optional rarity."""
-    prompt = generate_card_prompt(rarity)
-    max_attempts = 3
-    
-    for attempt in range(max_attempts):
-        try:
-            # Log that we're generating card data (not image)
-            logger.info("Generating card data with GPT-4...")
-            
-            response = openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a Magic: The Gathering card designer. Create balanced and thematic cards that follow the game's rules and mechanics. Keep abilities clear and concise, using established keyword mechanics where possible. Limit flavor text to one or two impactful sentences."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.7
-            )
-            
-            card_data_str = response.choices[0].message.content
-            logger.debug(f"Raw card data from GPT (attempt {attempt + 1}): {card_data_str}")
-            
-            try:
-                card_data = json.loads(card_data_str)
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {e}")
-                if attempt < max_attempts - 1:
-                    continue
-                raise ValueError("Failed to generate valid card data after multiple attempts")
-            
-            # Get themed elements based on colors
-            if 'color' in card_data:
-                colors = card_data['color'] if isinstance(card_data['color'], list) else [card_data['color']]
-                card_data['themes'] = get_themed_elements(colors)
-            
-            standardize_card_data(card_data)
-            
-            if not validate_card_data(card_data):
-                if attempt < max_attempts - 1:
-                    logger.warning(f"Invalid card data on attempt {attempt + 1}, retrying...")
-                    continue
-                raise ValueError("Failed to generate valid card data after multiple attempts")
-            
-            set_name, set_number, card_number = get_next_set_name_and_number()
-            
-            if not rarity:
-                card_rarity = get_rarity(set_number, card_number)
-                card_data['rarity'] = card_rarity.value
-            
-            card_data['set_name'] = set_name
-            card_data['card_number'] = card_number
-            
-            try:
-                # Log successful card data generation
-                logger.info("Card data generated successfully")
-                logger.debug(f"Final card data: {json.dumps(card_data, indent=2)}")
-                
-                # Try to generate the image
-                dalle_url, b2_url = generate_card_image(card_data)
-                
-                # If we got here, both card data and image generation succeeded
-                card_data['dalle_url'] = dalle_url
-                card_data['b2_url'] = b2_url
-                
-                return card_data
-                
-            except Exception as img_error:
-                logger.error(f"Error during image generation: {img_error}")
-                if attempt < max_attempts - 1:
-                    continue
-                raise ValueError(f"Failed to generate card image after {max_attempts} attempts: {str(img_error)}")
-                
-        except Exception as e:
-            logger.error(f"Error generating card data (attempt {attempt + 1}): {e}")
-            if attempt < max_attempts - 1:
-                continue
-            raise ValueError(f"Failed to generate card after {max_attempts} attempts: {str(e)}")
+    return {k: v / total for k, v in probabilities.items()}
 
-@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(5))
-def generate_card_image(card_data: Dict[str, Any]) -> Tuple[str, str]:
-    """Generate artwork for the card using OpenAI's image generation API."""
-    logger.info(f"\n=== Generating image for card: {card_data.get('name')} ===")
-    
-    # Get card details
-    card_type = card_data.get('type', 'Unknown')
-    color_str = card_data.get('color', '')
-    if isinstance(color_str, list):
-        color_str = '/'.join(color_str)
-    
-    # Create a focused prompt for the image
-    prompt = (
-        f"Professional fantasy character art of a {card_type.lower()} for Magic card. "
-        f"Create ONLY the main character in {color_str} colors, centered in frame. "
-        "Use a completely plain white background. "
-        "NO background elements, NO patterns, NO decorative effects - ONLY the character. "
-        "Style: Detailed digital art like a 3D model render. "
-    )
-    max_attempts = 3
+def _rarity_bucket(set_number: int, card_number: int) -> Tuple[int, int]:
+    """Collapse set and card numbers to the adjustment cases _rarity_probabilities applies."""
+    set_bucket = 3 if set_number % 3 == 0 else 2 if set_number % 2 == 0 else 1
+    card_bucket = 100 if card_number % 100 == 0 else 10 if card_number % 10 == 0 else 1
+    return set_bucket, card_bucket
 
-    for attempt in range(max_attempts):
-        logger.info(f"\nAttempt {attempt + 1} of {max_attempts}")
+# One rarity table per adjustment case; each bucket value is its own representative
+_RARITY_TABLES = {
+    (set_bucket, card_bucket): AliasTable.from_weights(_rarity_probabilities(set_bucket, card_bucket))
+    for set_bucket in (1, 2, 3)
+    for card_bucket in (1, 10, 100)
+}
+
+def get_rarity(set_number: int, card_number: int) -> Rarity:
+    """Determine card rarity based on set and card number."""
+    return _RARITY_TABLES[_rarity_bucket(set_number, card_number)].sample()
+
+# Chat model for card text; the gpt-4o family supports automatic prompt caching
+CARD_MODEL = "gpt-4o-mini"
+CARD_MAX_TOKENS = 800
+# Account limits for CARD_MODEL that concurrent generation is paced under
+CARD_REQUESTS_PER_MINUTE = 500
+CARD_TOKENS_PER_MINUTE = 200_000
+
+class TokenBucket:
+    """Thread-safe token bucket that paces usage under a per-minute limit."""
+    __slots__ = ('capacity', 'rate', '_tokens', '_updated', '_lock')
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until amount tokens are available, then take them.
+
+        Raises ValueError if amount exceeds the bucket's capacity, since the
+        bucket could never hold that many tokens.
+        """
+        if amount > self.capacity:
+            raise ValueError(f"Cannot acquire {amount} tokens from a bucket holding at most {self.capacity}")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+_chat_requests = TokenBucket(CARD_REQUESTS_PER_MINUTE)
+_chat_tokens = TokenBucket(CARD_TOKENS_PER_MINUTE)
+
+# Sent with every request so OpenAI routes them to the same prompt cache
+CARD_PROMPT_CACHE_KEY = "playmoretcg-card-generator"
+
+# Card text requests are retried only here: _create_card_completion() backs
+# off on rate limits and transient API errors and generate_card_data()
+# re-asks at once on a bad reply, so the client's own retries are turned off
+CARD_MAX_ATTEMPTS = 5
+CARD_MAX_INVALID_REPLIES = 2
+# gpt-4o-mini returns at most 16,384 output tokens per completion, which
+# bounds how many cards fit in one generate_cards_data() request
+CARD_MODEL_MAX_OUTPUT_TOKENS = 16_384
+MAX_CARDS_PER_REQUEST = CARD_MODEL_MAX_OUTPUT_TOKENS // CARD_MAX_TOKENS
+_TRANSIENT_API_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+_chat_client = openai_client.with_options(max_retries=0)
+# DALL-E requests are likewise retried only by generate_card_image()
+IMAGE_MAX_ATTEMPTS = 3
+_image_client = openai_client.with_options(max_retries=0)
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff, capped at a minute."""
+    return _random() * min(60, 2 ** (attempt + 1))
+
+# The system message is identical for every card and every retry
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a Magic: The Gathering card designer. Create balanced and thematic cards that follow the game's rules and mechanics. Keep abilities clear and concise, using established keyword mechanics where possible. Limit flavor text to one or two impactful sentences. Respond with a single JSON object."
+}
+
+def card_chat_params(prompt: str, max_tokens: int = CARD_MAX_TOKENS) -> Dict[str, Any]:
+    """Chat completion arguments for a card prompt, shared by live and batched requests."""
+    return {
+        "model": CARD_MODEL,
+        "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "response_format": {"type": "json_object"},
+        "prompt_cache_key": CARD_PROMPT_CACHE_KEY,
+    }
+
+def finish_card_data(card_data: Dict[str, Any], rarity: str = None) -> bool:
+    """Standardize a GPT card and number it. Returns False if the card is invalid."""
+    # Get themed elements based on colors
+    if 'color' in card_data:
+        card_colors = card_data['color'] if isinstance(card_data['color'], list) else [card_data['color']]
+        card_data['themes'] = get_themed_elements(card_colors)
+    
+    if not standardize_card_data(card_data):
+        return False
+    
+    set_name, set_number, card_number = get_next_set_name_and_number()
+    
+    if not rarity:
+        card_rarity = get_rarity(set_number, card_number)
+        card_data['rarity'] = card_rarity.value
+    
+    card_data['set_name'] = set_name
+    card_data['card_number'] = card_number
+    return True
+
+def _create_card_completion(params: Dict[str, Any], estimated_tokens: int) -> str:
+    """Send a card chat request within the rate limits and return the reply text.
+
+    Rate limits, timeouts, connection errors and 5xx responses are retried
+    with backoff, up to CARD_MAX_ATTEMPTS requests in all.
+    """
+    for attempt in range(CARD_MAX_ATTEMPTS):
+        _chat_requests.acquire()
+        _chat_tokens.acquire(estimated_tokens)
         try:
-            # Log DALL-E request
-            logger.info("\nSending request to DALL-E API:")
-            logger.info(f"Model: dall-e-3")
-            logger.info(f"Size: 1024x1024")
-            logger.info(f"Quality: hd")  # Use HD quality for better detail
-            logger.info(f"Style: vivid")  # Use vivid for stronger artistic direction
-            logger.info(f"Prompt: {prompt}")
-            
-            # Generate image with DALL-E
-            response = openai_client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size="1024x1024",
-                quality="hd",  # Higher quality
-                n=1,
-                style="vivid"  # Better for fantasy art
-            )
-            
-            # Log DALL-E response
-            image_url = response.data[0].url
-            logger.info("\nReceived response from DALL-E API:")
-            logger.info(f"Image URL: {image_url}")
-            if hasattr(response.data[0], 'revised_prompt'):
-                logger.info(f"Revised prompt: {response.data[0].revised_prompt}")
-            
-            # Download image from OpenAI with timeout and retries
-            download_attempts = 3
-            for dl_attempt in range(download_attempts):
-                try:
-                    response = requests.get(image_url, timeout=30)
-                    if response.status_code == 200:
-                        break
-                    logger.warning(f"Failed to download image (attempt {dl_attempt + 1}): Status {response.status_code}")
-                    if dl_attempt == download_attempts - 1:
-                        raise ValueError(f"Failed to download image after {download_attempts} attempts")
-                except requests.RequestException as e:
-                    if dl_attempt == download_attempts - 1:
-                        raise
-                    logger.warning(f"Download attempt {dl_attempt + 1} failed: {e}")
-            
-            # Prepare image data for upload
-            image_data = response.content
-            if not image_data:
-                raise ValueError("Downloaded image data is empty")
-                
-            filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
-            
-            # Upload to Backblaze with validation
-            try:
-                b2_url = upload_image(image_data, filename)
-                if not b2_url:
-                    raise ValueError("Failed to get valid URL from Backblaze upload")
-                return image_url, b2_url
-            except Exception as e:
-                logger.error(f"Backblaze upload error: {e}")
-                if attempt < max_attempts - 1:
-                    continue
+            response = _chat_client.chat.completions.create(**params)
+        except _TRANSIENT_API_ERRORS as e:
+            if attempt == CARD_MAX_ATTEMPTS - 1:
                 raise
-            
-        except Exception as e:
-            logger.error(f"Error generating card image (attempt {attempt + 1}): {e}")
-            if attempt < max_attempts - 1:
-                continue
-            raise ValueError(f"Failed to generate and store card image after {max_attempts} attempts: {str(e)}")
+            delay = _backoff_delay(attempt)
+            logger.warning("Card request failed (attempt %d): %s; retrying in %.1fs", attempt + 1, e, delay)
+            time.sleep(delay)
+            continue
+        return response.choices[0].message.content
+
+def _try_finish_card_data(card_data: Any, rarity: str = None) -> bool:
+    """finish_card_data() for an untrusted reply, treating malformed fields as an invalid card."""
+    if not isinstance(card_data, dict):
+        return False
+    try:
+        return finish_card_data(card_data, rarity)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error("Malformed card data: %r", e)
+        return False
+
+def generate_card_data(rarity: str = None, card_type: str = None, colors: Sequence[str] = None) -> Dict[str, Any]:
+    """Generate a card's text with GPT, without its artwork.
+
+    card_type and colors are passed through to generate_card_prompt(), so batch
+    callers can draw them up front.
+    """
+    prompt = generate_card_prompt(rarity, card_type, colors)
+    params = card_chat_params(prompt)
+    # Rough token cost for rate limiting: ~4 characters per prompt token plus
+    # the completion budget
+    estimated_tokens = (len(_SYSTEM_MESSAGE["content"]) + len(prompt)) // 4 + CARD_MAX_TOKENS
+    
+    for attempt in range(CARD_MAX_INVALID_REPLIES):
+        # Log that we're generating card data (not image)
+        logger.info("Generating card data with %s...", CARD_MODEL)
+        card_data_str = _create_card_completion(params, estimated_tokens)
+        logger.debug("Raw card data from GPT (attempt %d): %s", attempt + 1, card_data_str)
+        
+        # JSON mode guarantees parseable output, so a bad reply is one cut off
+        # at max_tokens or a card that fails validation; ask again straight away
+        try:
+            card_data = orjson.loads(card_data_str)
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON response: %s", e)
+            card_data = None
+        
+        if card_data is None or not _try_finish_card_data(card_data, rarity):
+            if attempt < CARD_MAX_INVALID_REPLIES - 1:
+                logger.warning("Invalid card data on attempt %d, retrying...", attempt + 1)
+            continue
+        
+        # Log successful card data generation
+        logger.info("Card data generated successfully")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Final card data: %s", orjson.dumps(card_data, option=orjson.OPT_INDENT_2).decode())
+        
+        return card_data
+    
+    raise ValueError(f"Failed to generate valid card data after {CARD_MAX_INVALID_REPLIES} attempts")
+
+def generate_cards_data(count: int, rarity: str = None) -> List[Dict[str, Any]]:
+    """Generate the text of count cards with a single GPT request.
+
+    The instructions are sent once for the whole batch, so this costs far fewer
+    prompt tokens than count calls to generate_card_data(). Cards that fail
+    validation are dropped, so fewer than count cards may be returned.
+    count must be between 1 and MAX_CARDS_PER_REQUEST.
+    """
+    if not 1 <= count <= MAX_CARDS_PER_REQUEST:
+        raise ValueError(f"count must be between 1 and {MAX_CARDS_PER_REQUEST}, got {count}")
+    
+    prompt = generate_cards_prompt(count, rarity)
+    max_tokens = CARD_MAX_TOKENS * count
+    estimated_tokens = (len(_SYSTEM_MESSAGE["content"]) + len(prompt)) // 4 + max_tokens
+    
+    logger.info("Generating data for %d cards with %s...", count, CARD_MODEL)
+    cards_str = _create_card_completion(card_chat_params(prompt, max_tokens), estimated_tokens)
+    logger.debug("Raw card batch from GPT: %s", cards_str)
+    try:
+        cards = orjson.loads(cards_str).get('cards')
+    except (orjson.JSONDecodeError, AttributeError) as e:
+        raise ValueError(f"Failed to parse card batch: {e}")
+    if not isinstance(cards, list):
+        raise ValueError("Card batch response has no cards array")
+    
+    valid_cards = []
+    for card_data in cards[:count]:
+        if _try_finish_card_data(card_data, rarity):
+            valid_cards.append(card_data)
+        else:
+            logger.warning("Dropping invalid card from batch: %s", card_data)
+    
+    logger.info("Generated %d of %d cards in one request", len(valid_cards), count)
+    return valid_cards
+
+def generate_card(rarity: str = None, card_type: str = None, colors: Sequence[str] = None) -> Dict[str, Any]:
+    """Generate a card with optional rarity, including its artwork."""
+    card_data = generate_card_data(rarity, card_type, colors)
+    
+    try:
+        dalle_url, b2_url = generate_card_image(card_data)
+    except Exception as img_error:
+        logger.error("Error during image generation: %s", img_error)
+        raise
+    
+    card_data['dalle_url'] = dalle_url
+    card_data['b2_url'] = b2_url
+    return card_data
+
+async def generate_cards_batch(n: int, rarity: str = None, max_concurrency: int = 8) -> List[Dict[str, Any]]:
+    """Generate n cards concurrently.
+
+    Cards move through two stages, GPT text then DALL-E image plus download and
+    upload, each allowing max_concurrency cards at a time. A card waiting on its
+    image no longer holds a text slot, so the next card's GPT call starts while
+    earlier images are still in flight. The blocking clients run on a thread
+    pool sized for both stages.
+    
+    With a rarity given, every card's type and colors are drawn in one batch
+    before any requests go out. Cards that fail are logged and left out, so one
+    failure doesn't throw away the rest of the batch.
+    """
+    loop = asyncio.get_running_loop()
+    text_slots = asyncio.Semaphore(max_concurrency)
+    image_slots = asyncio.Semaphore(max_concurrency)
+
+    executor = ThreadPoolExecutor(max_workers=2 * max_concurrency)
+
+    async def generate_one(card_type: str, colors: Sequence[str]) -> Dict[str, Any]:
+        async with text_slots:
+            card_data = await loop.run_in_executor(executor, generate_card_data, rarity, card_type, colors)
+        async with image_slots:
+            dalle_url, b2_url = await loop.run_in_executor(executor, generate_card_image, card_data)
+        card_data['dalle_url'] = dalle_url
+        card_data['b2_url'] = b2_url
+        return card_data
+
+    try:
+        results = await asyncio.gather(*(
+            generate_one(card_type, colors)
+            for card_type, colors in _draw_types_and_colors(n, rarity)
+        ), return_exceptions=True)
+    finally:
+        # Don't block the event loop joining threads; if the batch is
+        # cancelled, drop the cards that haven't started
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    cards = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Card generation failed in batch: %s", result)
+        else:
+            cards.append(result)
+    return cards
+
+# DALL-E art direction for non-creature cards, matched in order against the type line
+_RUNE_ART_STYLE = (
+    "Professional illustration of a single {color} magical rune or sigil "
+    "floating in empty space. Rune/sigil must be the ONLY element, centered "
+    "against a pure white background. NO effects, NO patterns, NO decorative elements. "
+    "Think minimalist magical symbol on white backdrop."
+)
+NON_CREATURE_ART_STYLES = (
+    ('Enchantment', (
+        "Professional illustration of a single {color} magical crystal or orb "
+        "floating in empty space. Crystal/orb must be the ONLY element, centered "
+        "against a pure white background. NO effects, NO patterns, NO decorative elements. "
+        "Think high-end jewelry photography on white backdrop."
+    )),
+    ('Artifact', (
+        "Professional illustration of a single {color} magical artifact "
+        "floating in empty space. Artifact must be the ONLY element, centered "
+        "against a pure white background. NO effects, NO patterns, NO decorative elements. "
+        "Think product photography of a precious object on white backdrop."
+    )),
+    ('Instant', _RUNE_ART_STYLE),
+    ('Sorcery', _RUNE_ART_STYLE),
+)
+DEFAULT_ART_STYLE = (
+    "Professional illustration of a single {color} magical object "
+    "floating in empty space. Object must be the ONLY element, centered "
+    "against a pure white background. NO effects, NO patterns, NO decorative elements. "
+    "Think product photography on white backdrop."
+)
 
 def create_dalle_prompt(card_data: Dict[str, Any]) -> str:
     """Create a focused DALL-E prompt for card artwork."""
@@ -595,60 +893,69 @@ def create_dalle_prompt(card_data: Dict[str, Any]) -> str:
         )
     else:
         # For non-creature cards, be specific about what we want based on card type
-        if 'Enchantment' in card_type:
-            style = (
-                f"Professional illustration of a single {color_str} magical crystal or orb "
-                "floating in empty space. Crystal/orb must be the ONLY element, centered "
-                "against a pure white background. NO effects, NO patterns, NO decorative elements. "
-                "Think high-end jewelry photography on white backdrop."
-            )
-        elif 'Artifact' in card_type:
-            style = (
-                f"Professional illustration of a single {color_str} magical artifact "
-                "floating in empty space. Artifact must be the ONLY element, centered "
-                "against a pure white background. NO effects, NO patterns, NO decorative elements. "
-                "Think product photography of a precious object on white backdrop."
-            )
-        elif 'Instant' in card_type or 'Sorcery' in card_type:
-            style = (
-                f"Professional illustration of a single {color_str} magical rune or sigil "
-                "floating in empty space. Rune/sigil must be the ONLY element, centered "
-                "against a pure white background. NO effects, NO patterns, NO decorative elements. "
-                "Think minimalist magical symbol on white backdrop."
-            )
-        else:
-            style = (
-                f"Professional illustration of a single {color_str} magical object "
-                "floating in empty space. Object must be the ONLY element, centered "
-                "against a pure white background. NO effects, NO patterns, NO decorative elements. "
-                "Think product photography on white backdrop."
-            )
+        template = next(
+            (style for type_word, style in NON_CREATURE_ART_STYLES if type_word in card_type),
+            DEFAULT_ART_STYLE
+        )
+        style = template.format(color=color_str)
     
     # Log the prompt
-    logger.info(f"Generated DALL-E prompt for {name}:")
-    logger.info(style)
+    logger.debug("Generated DALL-E prompt for %s:\n%s", name, style)
     
     return style
 
+def _store_card_image(dalle_url: str, filename: str) -> str:
+    """Copy a generated image from DALL-E to Backblaze and return its B2 URL.
+
+    The body is streamed straight into the upload when its size is known. If
+    that upload fails, the image is downloaded again and handed to
+    upload_image(), which falls back to local storage, so a B2 outage never
+    costs a new DALL-E image.
+    """
+    with _http.get(dalle_url, timeout=(5, 30), stream=True) as response:
+        if response.status_code != 200:
+            raise ValueError(f"Failed to download image: Status {response.status_code}")
+        
+        content_length = int(response.headers.get('Content-Length') or 0)
+        if not content_length or response.headers.get('Content-Encoding'):
+            return _upload_buffered(response.content, filename)
+        try:
+            return upload_image_stream(response.raw, filename, content_length)
+        except Exception as e:
+            logger.warning("Streamed upload of %s failed, retrying buffered: %s", filename, e)
+    
+    # The stream was consumed by the failed upload, so fetch the image again
+    with _http.get(dalle_url, timeout=(5, 30)) as response:
+        if response.status_code != 200:
+            raise ValueError(f"Failed to download image: Status {response.status_code}")
+        return _upload_buffered(response.content, filename)
+
+def _upload_buffered(image_data: bytes, filename: str) -> str:
+    """Upload a fully downloaded image, falling back to local storage on failure."""
+    if not image_data:
+        raise ValueError("Downloaded image data is empty")
+    return upload_image(image_data, filename)
+
 def generate_card_image(card_data: Dict[str, Any]) -> Tuple[str, str]:
     """Generate artwork for the card using OpenAI's image generation API."""
-    logger.info(f"\n=== Generating image for card: {card_data.get('name')} ===")
+    logger.info("\n=== Generating image for card: %s ===", card_data.get('name'))
     prompt = create_dalle_prompt(card_data)
-    max_attempts = 3
     last_error = None
+    dalle_url = None
 
-    for attempt in range(max_attempts):
+    # Only the DALL-E request is retried here, and only on rate limits and
+    # transient API errors; once an image exists it is stored as is rather
+    # than paid for again
+    for attempt in range(IMAGE_MAX_ATTEMPTS):
+        # Log DALL-E request
+        logger.info(
+            "\nSending request to DALL-E API:\nModel: dall-e-3\nSize: 1024x1024\n"
+            "Quality: hd\nStyle: vivid\nPrompt: %s", prompt
+        )
+        
         try:
-            # Log DALL-E request
-            logger.info("\nSending request to DALL-E API:")
-            logger.info(f"Model: dall-e-3")
-            logger.info(f"Size: 1024x1024")
-            logger.info(f"Quality: hd")
-            logger.info(f"Style: vivid")
-            logger.info(f"Prompt: {prompt}")
-            
             # Generate image with DALL-E
-            response = openai_client.images.generate(
+            response = _image_client.images.generate(
                 model="dall-e-3",
                 prompt=prompt,
                 size="1024x1024",
@@ -656,44 +963,38 @@ def generate_card_image(card_data: Dict[str, Any]) -> Tuple[str, str]:
                 n=1,
                 style="vivid"
             )
-            
-            # Get the image URL
-            dalle_url = response.data[0].url
-            logger.info("\nReceived response from DALL-E API:")
-            logger.info(f"Image URL: {dalle_url}")
-            
-            if not dalle_url:
-                raise ValueError("Failed to get valid URL from DALL-E")
-            
-            # Download and upload to Backblaze
-            response = requests.get(dalle_url, timeout=30)
-            if response.status_code != 200:
-                raise ValueError(f"Failed to download image: Status {response.status_code}")
-            
-            image_data = response.content
-            if not image_data:
-                raise ValueError("Downloaded image data is empty")
-            
-            filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
-            b2_url = upload_image(image_data, filename)
-            
-            if not b2_url:
-                raise ValueError("Failed to get valid URL from Backblaze upload")
-            
-            return dalle_url, b2_url
-            
-        except Exception as e:
-            logger.error(f"Error generating card image (attempt {attempt + 1}): {e}")
+        except _TRANSIENT_API_ERRORS as e:
             last_error = e
-            logger.warning(f"Attempt {attempt + 1} failed, {'retrying' if attempt < max_attempts - 1 else 'giving up'}")
+            if attempt == IMAGE_MAX_ATTEMPTS - 1:
+                break
+            delay = _backoff_delay(attempt)
+            logger.warning("Image request failed (attempt %d): %s; retrying in %.1fs", attempt + 1, e, delay)
+            time.sleep(delay)
             continue
+        except Exception as e:
+            # Content policy rejections and other client errors won't succeed on retry
+            raise ValueError(f"Failed to generate card image: {str(e)}")
+        
+        # Get the image URL
+        dalle_url = response.data[0].url
+        logger.info("\nReceived response from DALL-E API:\nImage URL: %s", dalle_url)
+        
+        if not dalle_url:
+            raise ValueError("Failed to get valid URL from DALL-E")
+        break
+    
+    if not dalle_url:
+        logger.error("All %d attempts failed", IMAGE_MAX_ATTEMPTS)
+        raise ValueError(f"Failed to generate card image: {str(last_error)}")
     
-    # If we've exhausted all attempts, raise the last error
-    if last_error:
-        logger.error(f"All {max_attempts} attempts failed")
-        raise ValueError(f"Failed to generate and store card image: {str(last_error)}")
+    # Download and upload to Backblaze
+    filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
+    try:
+        b2_url = _store_card_image(dalle_url, filename)
+    except Exception as e:
+        raise ValueError(f"Failed to store card image: {str(e)}")
     
-    # This should never be reached as we either return in the try block or raise in the error handling
-    raise ValueError("Unexpected error in image generation")
+    if not b2_url:
+        raise ValueError("Failed to get valid URL from Backblaze upload")
     
-    return prompt
\ No newline at end of file
+    return dalle_url, b2_url
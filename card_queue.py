@@ -1,14 +1,14 @@
-from typing import Dict, Any, Optional, List, Deque
-from collections import deque
+from typing import Dict, Any, Optional, List, Set, Tuple
+from collections import OrderedDict
 from fastapi import BackgroundTasks
 import asyncio
-from datetime import datetime
+import heapq
+import time
+from datetime import datetime, timezone
 import logging
-import json
 from enum import Enum, auto
-from card_generator import generate_card, generate_card_image
-from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
-from firestore_db_ops.card_ops import create_card
+from card_generator import generate_card_data, generate_card_image
+from firestore_db_ops.card_ops import MAX_BATCH_WRITES, create_card, create_cards_batch
 
 # Configure logging
 logging.basicConfig(
@@ -44,65 +44,162 @@ class TaskNotFoundError(CardGenerationError):
     def __init__(self, task_id: str):
         super().__init__(f"Task {task_id} not found", TaskState.NOT_FOUND)
 
+def _iso_timestamp(timestamp: Optional[float]) -> Optional[str]:
+    """Render epoch seconds as a UTC ISO 8601 string."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
 class Task:
     """Represents a card generation task."""
+    __slots__ = (
+        'task_id', 'user_id', 'rarity', 'state', 'created_at', 'updated_at',
+        'completed_at', 'card_id', 'error', 'retry_count', '_final_dict'
+    )
+    
     def __init__(self, task_id: str, user_id: str, rarity: Optional[str] = None):
         self.task_id = task_id
         self.user_id = user_id
         self.rarity = rarity
         self.state = TaskState.QUEUED
-        self.created_at = datetime.utcnow()
+        # Epoch seconds; rendered as ISO strings only in to_dict()
+        self.created_at = time.time()
         self.updated_at = self.created_at
-        self.completed_at: Optional[datetime] = None
+        self.completed_at: Optional[float] = None
         self.card_id: Optional[str] = None
         self.error: Optional[str] = None
         self.retry_count = 0
+        # Built once the task finishes; status polls then reuse it
+        self._final_dict: Optional[Dict[str, Any]] = None
 
     def update_state(self, new_state: TaskState, error: Optional[str] = None) -> None:
         """Update task state with logging."""
         old_state = self.state
         self.state = new_state
-        self.updated_at = datetime.utcnow()
+        self.updated_at = time.time()
         if error:
             self.error = error
         if new_state == TaskState.COMPLETED:
             self.completed_at = self.updated_at
+        if new_state in (TaskState.COMPLETED, TaskState.FAILED):
+            self._final_dict = self._build_dict()
         logger.info(f"Task {self.task_id} state changed: {old_state} -> {new_state}")
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert task to dictionary."""
+        """Convert task to dictionary.
+
+        Finished tasks no longer change, so they return the same dictionary
+        every time; callers must not modify it.
+        """
+        if self._final_dict is not None:
+            return self._final_dict
+        return self._build_dict()
+
+    def _build_dict(self) -> Dict[str, Any]:
+        """Build the dictionary for the task's current state."""
         return {
             'task_id': self.task_id,
             'user_id': self.user_id,
             'state': self.state,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at,
-            'completed_at': self.completed_at,
+            'created_at': _iso_timestamp(self.created_at),
+            'updated_at': _iso_timestamp(self.updated_at),
+            'completed_at': _iso_timestamp(self.completed_at),
             'card_id': self.card_id,
             'error': self.error,
             'retry_count': self.retry_count
         }
 
+class CardBatchWriter:
+    """Saves finished cards to Firestore in batched writes.
+
+    A batch is written once max_batch_size cards are waiting or max_wait
+    seconds after its first card arrived, whichever comes first. If a batch
+    fails, its cards are retried one at a time so a single bad card doesn't
+    fail the rest.
+    """
+    def __init__(self, max_batch_size: int = 50, max_wait: float = 0.5):
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_WRITES)
+        self.max_wait = max_wait
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._runner: Optional[asyncio.Task] = None
+        
+    async def write(self, card_data: Dict[str, Any], image_url: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a card for the next batch and wait until it is saved."""
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        saved = asyncio.get_running_loop().create_future()
+        await self._pending.put(((card_data, image_url, filename), saved))
+        return await saved
+        
+    async def _run(self) -> None:
+        """Collect pending cards into batches and write them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+            
+    async def _flush(self, batch: List[tuple]) -> None:
+        """Write one batch, falling back to single writes if it fails."""
+        try:
+            cards = await asyncio.to_thread(create_cards_batch, [entry for entry, _ in batch])
+        except Exception as e:
+            logger.warning(f"Batch write of {len(batch)} cards failed, saving them one at a time: {e}")
+        else:
+            for (_, saved), card in zip(batch, cards):
+                if not saved.done():
+                    saved.set_result(card)
+            return
+            
+        for entry, saved in batch:
+            try:
+                card = await asyncio.to_thread(create_card, *entry)
+            except Exception as e:
+                if not saved.done():
+                    saved.set_exception(e)
+            else:
+                if not saved.done():
+                    saved.set_result(card)
+
 class CardGenerationQueue:
-    def __init__(self, max_queue_size: int = 100, max_concurrent_tasks: int = 3):
-        self.queue: Deque[Task] = deque(maxlen=max_queue_size)
+    def __init__(self, max_queue_size: int = 100, max_concurrent_tasks: int = 3, max_completed: int = 10_000):
+        # Waiting tasks; get() sleeps until one arrives. shutdown() puts None
+        # to wake an idle processor.
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        # Queued tasks by ID, since an asyncio.Queue can't be searched
+        self._queued_index: Dict[str, Task] = {}
         self.processing: Dict[str, Task] = {}
-        self.completed: Dict[str, Task] = {}
-        self._lock = asyncio.Lock()
+        # Finished tasks in completion order, capped at max_completed
+        self.completed: OrderedDict[str, Task] = OrderedDict()
+        self._max_completed = max_completed
+        # (finished at, task ID) min-heap, oldest first, for expiring results
+        self._finished: List[Tuple[float, str]] = []
         self._semaphore = asyncio.Semaphore(max_concurrent_tasks)
+        # Running workers; the event loop only keeps weak references to tasks
+        self._workers: Set[asyncio.Task] = set()
+        self._card_writer = CardBatchWriter()
         self._stop_event = asyncio.Event()
         
     async def add_to_queue(self, task_id: str, user_id: str, rarity: Optional[str] = None) -> str:
         """Add a card generation task to the queue."""
         try:
-            if len(self.queue) >= self.queue.maxlen:
+            task = Task(task_id, user_id, rarity)
+            try:
+                self.queue.put_nowait(task)
+            except asyncio.QueueFull:
                 raise QueueFullError()
                 
-            async with self._lock:
-                task = Task(task_id, user_id, rarity)
-                self.queue.append(task)
-                logger.info(f"Added task {task_id} to queue. Queue size: {len(self.queue)}")
-                return task_id
+            self._queued_index[task_id] = task
+            logger.info(f"Added task {task_id} to queue. Queue size: {self.queue.qsize()}")
+            return task_id
         except QueueFullError:
             raise
         except Exception as e:
@@ -121,9 +218,8 @@ class CardGenerationQueue:
                 return self.completed[task_id].to_dict()
                 
             # Check queue
-            for task in self.queue:
-                if task.task_id == task_id:
-                    return task.to_dict()
+            if task_id in self._queued_index:
+                return self._queued_index[task_id].to_dict()
                     
             raise TaskNotFoundError(task_id)
             
@@ -137,90 +233,119 @@ class CardGenerationQueue:
                 'error': 'Failed to get task status'
             }
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        reraise=True
-    )
     async def _generate_card(self, task: Task) -> Dict[str, Any]:
-        """Generate a card with retries."""
+        """Generate a card; the generator retries its own API calls.
+
+        Takes over the caller's semaphore slot and frees it once the API
+        calls are done, before waiting on the batched Firestore write.
+        """
         try:
-            task.update_state(TaskState.GENERATING)
-            
-            # Generate card data
-            card_data = generate_card(task.rarity)
-            card_data['user_id'] = task.user_id
-            
-            task.update_state(TaskState.CREATING_IMAGE)
-            
+            try:
+                task.update_state(TaskState.GENERATING)
+                
+                # Generate card data and its uploaded artwork on worker threads,
+                # so the blocking API calls don't stall the event loop
+                card_data = await asyncio.to_thread(generate_card_data, task.rarity)
+                card_data['user_id'] = task.user_id
+                
+                task.update_state(TaskState.CREATING_IMAGE)
+                _, b2_url = await asyncio.to_thread(generate_card_image, card_data)
+                filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
+            finally:
+                # Let the next task start generating while this one waits,
+                # so writes from more than max_concurrent_tasks cards can
+                # share a batch
+                self._semaphore.release()
             
-            # Generate and upload image
-            image_url, b2_url = generate_card_image(card_data)
-            filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
+            # Create card in Firestore with the next batched write
             task.update_state(TaskState.SAVING)
-            
-            
-            # Create card in Firestore
-            card = create_card(card_data, image_url, filename)
+            card = await self._card_writer.write(card_data, b2_url, filename)
             return card
             
         except Exception as e:
             logger.error(f"Error generating card: {e}")
             raise
-    async def process_next(self) -> Optional[Dict[str, Any]]:
-        """Process the next card in the queue."""
-        async with self._lock:
-            if not self.queue:
-                return None
-                
-            task = self.queue.popleft()
-            self.processing[task.task_id] = task
             
+    def _start_task(self, task: Task) -> None:
+        """Move a task taken off the queue to processing."""
+        self._queued_index.pop(task.task_id, None)
+        self.processing[task.task_id] = task
+            
+    async def _run_task(self, task: Task) -> Dict[str, Any]:
+        """Generate the card for a task taken off the queue."""
         try:
-            async with self._semaphore:
-                try:
-                    card = await self._generate_card(task)
-                    task.card_id = card['id']
-                    task.update_state(TaskState.COMPLETED)
-                    
-                except RetryError as e:
-                    task.update_state(TaskState.FAILED, "Maximum retries exceeded")
-                    
-                except Exception as e:
-                    task.update_state(TaskState.FAILED, str(e))
-                
-                # Move to completed
-                self.completed[task.task_id] = task
-                return task.to_dict()
+            try:
+                card = await self._generate_card(task)
+                task.card_id = card['id']
+                task.update_state(TaskState.COMPLETED)
                 
+            except Exception as e:
+                task.update_state(TaskState.FAILED, str(e))
+            
+            # Move to completed
+            self.completed[task.task_id] = task
+            if len(self.completed) > self._max_completed:
+                self.completed.popitem(last=False)
+            heapq.heappush(self._finished, (task.updated_at, task.task_id))
+            return task.to_dict()
+            
         finally:
             # Always clean up processing state
             if task.task_id in self.processing:
                 del self.processing[task.task_id]
             
+    async def process_next(self) -> Optional[Dict[str, Any]]:
+        """Process the next card in the queue."""
+        # Return at once on an empty queue rather than waiting for a slot
+        if self.queue.empty():
+            return None
+        # The slot is handed to the task and freed by _generate_card(); the
+        # queue may have been drained while we waited for it
+        await self._semaphore.acquire()
+        try:
+            task = self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            task = None
+        if task is None:
+            self._semaphore.release()
+            return None
+        self._start_task(task)
+        return await self._run_task(task)
+            
     async def process_queue(self) -> None:
-        """Continuously process the queue."""
+        """Continuously process the queue, running up to max_concurrent_tasks cards at once."""
         while not self._stop_event.is_set():
+            # Hold a slot before taking a task, so waiting tasks stay queued;
+            # the slot is handed to the worker and freed by _generate_card()
+            await self._semaphore.acquire()
             try:
-                if self.queue:
-                    await self.process_next()
-                await asyncio.sleep(1)  # Prevent CPU overuse
-            except Exception as e:
-                logger.error(f"Error in queue processing: {e}")
-                await asyncio.sleep(5)  # Back off on error
+                task = await self.queue.get()
+            except BaseException:
+                self._semaphore.release()
+                raise
+            if task is None:
+                # Woken by shutdown()
+                self._semaphore.release()
+                continue
+                
+            self._start_task(task)
+            worker = asyncio.create_task(self._run_task(task))
+            self._workers.add(worker)
+            worker.add_done_callback(self._worker_done)
+                
+    def _worker_done(self, worker: asyncio.Task) -> None:
+        """Forget a finished worker."""
+        self._workers.discard(worker)
             
     def clean_old_results(self, max_age_hours: int = 24) -> None:
         """Clean up old results."""
         try:
-            current_time = datetime.utcnow()
-            to_remove = []
+            cutoff = time.time() - max_age_hours * 3600
             
-            for task_id, task in self.completed.items():
-                if task.completed_at and (current_time - task.completed_at).total_seconds() > max_age_hours * 3600:
-                    to_remove.append(task_id)
-                    
-            for task_id in to_remove:
-                del self.completed[task_id]
+            # Pop only the expired entries instead of scanning every result
+            while self._finished and self._finished[0][0] < cutoff:
+                _, task_id = heapq.heappop(self._finished)
+                self.completed.pop(task_id, None)
                 
         except Exception as e:
             logger.error(f"Error cleaning old results: {e}")
@@ -228,6 +353,12 @@ class CardGenerationQueue:
     async def shutdown(self) -> None:
         """Gracefully shut down the queue."""
         self._stop_event.set()
+        # Wake an idle processor so it sees the stop event; a full queue
+        # means it isn't waiting on get()
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
         # Wait for current processing to complete
         if self.processing:
             await asyncio.sleep(5)
@@ -237,13 +368,16 @@ card_queue = CardGenerationQueue()
 
 # Background task to process queue
 async def run_queue_processor() -> None:
-    try:
-        await card_queue.process_queue()
-    except Exception as e:
-        logger.error(f"Queue processor error: {e}")
-        # Attempt to restart the processor
-        await asyncio.sleep(5)
-        await run_queue_processor()
+    while True:
+        try:
+            # Returns once the queue is shut down
+            await card_queue.process_queue()
+            return
+        except Exception as e:
+            logger.error(f"Queue processor error: {e}")
+            # Restart the processor in this loop rather than recursing, so
+            # repeated crashes don't stack up frames
+            await asyncio.sleep(5)
 
 # Function to start queue processor
 def start_queue_processor(background_tasks: BackgroundTasks) -> None:
@@ -5,6 +5,9 @@ import requests
 # Load environment variables
 load_dotenv()
 
+# Reuse one connection to the DreamBees API across calls
+_http = requests.Session()
+
 def generate_content(prompt: str) -> str:
     """Generate content using DreamBees LLM API."""
     url = "https://api.dreambeesart.com/api/llm/generate/"
@@ -17,10 +20,8 @@ def generate_content(prompt: str) -> str:
             }
         ]
     }
-    headers = {
-        'Content-Type': 'application/json'
-    }
     
-    response = requests.post(url, headers=headers, json=payload)
+    # json= sets the Content-Type header
+    response = _http.post(url, json=payload)
     response.raise_for_status()
     return response.json()['text']
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import random
 from firestore_db_ops.firestore_init import db, card_to_dict, logger
@@ -6,8 +6,11 @@ from models import Rarity
 from google.api_core import exceptions
 from firebase_admin import firestore
 
-def create_card(card_data: Dict[str, Any], image_url: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
-    """Create a new card."""
+# Firestore accepts at most 500 writes in one batch
+MAX_BATCH_WRITES = 500
+
+def _new_card_document(card_data: Dict[str, Any], image_url: Optional[str] = None, filename: Optional[str] = None):
+    """Build the document reference and stored fields for a new card."""
     if image_url and filename:
         card_data['images'] = [{
             'backblaze_url': image_url,
@@ -15,14 +18,37 @@ def create_card(card_data: Dict[str, Any], image_url: Optional[str] = None, file
             'created_at': datetime.utcnow()
         }]
     
-    card_ref = db.collection('cards').document()
-    card_dict = card_to_dict(card_data)
+    return db.collection('cards').document(), card_to_dict(card_data)
+
+def create_card(card_data: Dict[str, Any], image_url: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+    """Create a new card."""
+    card_ref, card_dict = _new_card_document(card_data, image_url, filename)
     card_ref.set(card_dict)
     
     # Add ID to the returned dictionary
     card_dict['id'] = card_ref.id
     return card_dict
 
+def create_cards_batch(cards: List[Tuple[Dict[str, Any], Optional[str], Optional[str]]]) -> List[Dict[str, Any]]:
+    """Create several cards in one batched write.
+
+    Takes (card_data, image_url, filename) tuples and returns the created
+    cards in the same order. The batch is atomic: either every card is
+    written or none is.
+    """
+    if len(cards) > MAX_BATCH_WRITES:
+        raise ValueError(f"Cannot create more than {MAX_BATCH_WRITES} cards in one batch")
+    
+    batch = db.batch()
+    created = []
+    for card_data, image_url, filename in cards:
+        card_ref, card_dict = _new_card_document(card_data, image_url, filename)
+        batch.set(card_ref, card_dict)
+        card_dict['id'] = card_ref.id
+        created.append(card_dict)
+    batch.commit()
+    return created
+
 def get_card(card_id: str) -> Optional[Dict[str, Any]]:
     """Get card by ID."""
     doc = db.collection('cards').document(card_id).get()
@@ -33,12 +33,17 @@ def user_to_dict(user_data: Dict[str, Any]) -> Dict[str, Any]:
 
 def card_to_dict(card_data: Dict[str, Any]) -> Dict[str, Any]:
     """Convert card data to Firestore format."""
+    # Abilities are stored as one line-break separated string
+    abilities = card_data.get('abilities')
+    if isinstance(abilities, list):
+        abilities = '<br>'.join(abilities)
+    
     return {
         'name': card_data.get('name'),
         'manaCost': card_data.get('manaCost'),
         'type': card_data.get('type'),
         'color': card_data.get('color'),
-        'abilities': card_data.get('abilities'),
+        'abilities': abilities,
         'flavorText': card_data.get('flavorText'),
         'rarity': card_data.get('rarity'),
         'set_name': card_data.get('set_name'),
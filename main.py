@@ -119,12 +119,10 @@ async def create_card_handler(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        # Generate card data
+        # Generate card data and its uploaded artwork
         card_data = card_generator.generate_card(rarity)
         card_data['user_id'] = 'system'  # Created cards start unclaimed
-        
-        # Generate and upload image
-        image_url, b2_url = card_generator.generate_card_image(card_data)
+        b2_url = card_data['b2_url']
         filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
         
         # Create card in Firestore
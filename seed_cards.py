@@ -1,7 +1,8 @@
 import asyncio
 import logging
 from typing import List, Dict, Any
-from card_generator_1 import generate_card, generate_card_image
+from card_batch import generate_cards_data_batched
+from card_generator import generate_card_image
 import firestore_db
 from models import Rarity
 
@@ -23,18 +24,22 @@ CARDS_PER_RARITY = {
 ADMIN_USER_ID = "system"  # System user ID for generated cards
 
 async def generate_cards_for_rarity(rarity: Rarity, count: int) -> List[Dict[str, Any]]:
-    """Generate a specified number of cards for a given rarity."""
+    """Generate a specified number of cards for a given rarity.
+
+    Card text comes from one Batch API job, which is cheaper and not rate
+    limited but can take hours; artwork is then generated card by card.
+    """
+    logger.info(f"Submitting batch of {count} {rarity.value} cards")
+    card_texts = await asyncio.to_thread(generate_cards_data_batched, count, rarity.value)
+    
     cards = []
-    for i in range(count):
+    for i, card_data in enumerate(card_texts):
         try:
-            logger.info(f"Generating {rarity.value} card {i+1}/{count}")
-            
-            # Generate card data
-            card_data = generate_card(rarity.value)
+            logger.info(f"Creating artwork for {rarity.value} card {i+1}/{len(card_texts)}")
             card_data['user_id'] = ADMIN_USER_ID
             
             # Generate and upload image
-            image_url, b2_url = generate_card_image(card_data)
+            _, b2_url = await asyncio.to_thread(generate_card_image, card_data)
             filename = f"card_{card_data['set_name']}_{card_data['card_number']}.png"
             
             # Create card in Firestore
@@ -56,9 +61,17 @@ async def seed_database():
     """Generate all cards for the database."""
     total_cards = []
     
-    for rarity, count in CARDS_PER_RARITY.items():
-        logger.info(f"Starting generation of {count} {rarity.value} cards")
-        cards = await generate_cards_for_rarity(rarity, count)
+    # Run every rarity's batch at once rather than waiting on each in turn
+    logger.info(f"Starting generation of {sum(CARDS_PER_RARITY.values())} cards")
+    results = await asyncio.gather(*(
+        generate_cards_for_rarity(rarity, count)
+        for rarity, count in CARDS_PER_RARITY.items()
+    ), return_exceptions=True)
+    for rarity, cards in zip(CARDS_PER_RARITY, results):
+        # A failed batch only costs its own rarity's cards
+        if isinstance(cards, Exception):
+            logger.error(f"Generation of {rarity.value} cards failed: {cards}")
+            continue
         total_cards.extend(cards)
         logger.info(f"Completed generation of {len(cards)} {rarity.value} cards")
     